@@ -0,0 +1,249 @@
+// Allocation profiler, preloaded into a demo with --alloc-profile:
+//   LD_PRELOAD=build/liballoc_profile.so ALLOC_PROFILE_OUT=results/alloc_x.jsonl ./build/x 4
+// Counts calls, bytes, peak live bytes and time spent in malloc/calloc/realloc/free
+// and the aligned allocators per thread and writes one JSON line per thread when the
+// program exits. "bytes" is the requested size; realloc only adds the growth over the old block.
+// Not a .cpp on purpose - the controller treats every cpp/*.cpp as a demo.
+#define _GNU_SOURCE
+#include <errno.h>
+#include <malloc.h>
+#include <stdatomic.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/syscall.h>
+
+// glibc entry points, calling them directly avoids the dlsym/calloc recursion of RTLD_NEXT
+extern void* __libc_malloc(size_t size);
+extern void* __libc_calloc(size_t count, size_t size);
+extern void* __libc_realloc(void* ptr, size_t size);
+extern void __libc_free(void* ptr);
+extern void* __libc_memalign(size_t alignment, size_t size);
+extern void* __libc_valloc(size_t size);
+extern void* __libc_pvalloc(size_t size);
+
+#define MAX_THREADS 1024
+
+struct thread_stats {
+    long tid;
+    unsigned long mallocs;
+    unsigned long callocs;
+    unsigned long reallocs;
+    unsigned long aligned;      // posix_memalign, aligned_alloc, memalign, valloc, pvalloc
+    unsigned long frees;
+    unsigned long bytes;        // requested bytes
+    long live;                  // usable bytes allocated minus freed by this thread
+    long peak_live;
+    unsigned long long alloc_ns;
+};
+
+static struct thread_stats slots[MAX_THREADS];
+static atomic_int used_slots;
+static atomic_int dropped_threads;
+static const char* output_path;
+
+// initial-exec: the TLS block must exist before the first malloc, it can't be allocated lazily
+static __thread struct thread_stats* self __attribute__((tls_model("initial-exec")));
+static __thread int untracked __attribute__((tls_model("initial-exec")));
+
+static struct thread_stats* stats(void) {
+    if(self || untracked) {
+        return self;
+    }
+
+    int slot = atomic_fetch_add(&used_slots, 1);
+    if(slot >= MAX_THREADS) {
+        atomic_fetch_add(&dropped_threads, 1);
+        untracked = 1;
+        return NULL;
+    }
+
+    self = &slots[slot];
+    self->tid = syscall(SYS_gettid);
+    return self;
+}
+
+static unsigned long long now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (unsigned long long)ts.tv_sec * 1000000000ull + ts.tv_nsec;
+}
+
+static void account(struct thread_stats* s, long delta, unsigned long long elapsed) {
+    s->live += delta;
+    if(s->live > s->peak_live) {
+        s->peak_live = s->live;
+    }
+    s->alloc_ns += elapsed;
+}
+
+void* malloc(size_t size) {
+    struct thread_stats* s = stats();
+    unsigned long long start = now_ns();
+    void* ptr = __libc_malloc(size);
+    unsigned long long elapsed = now_ns() - start;
+
+    if(s) {
+        s->mallocs++;
+        s->bytes += size;
+        account(s, ptr ? (long)malloc_usable_size(ptr) : 0, elapsed);
+    }
+    return ptr;
+}
+
+void* calloc(size_t count, size_t size) {
+    struct thread_stats* s = stats();
+    unsigned long long start = now_ns();
+    void* ptr = __libc_calloc(count, size);
+    unsigned long long elapsed = now_ns() - start;
+
+    if(s) {
+        s->callocs++;
+        s->bytes += count * size;
+        account(s, ptr ? (long)malloc_usable_size(ptr) : 0, elapsed);
+    }
+    return ptr;
+}
+
+void* realloc(void* ptr, size_t size) {
+    struct thread_stats* s = stats();
+    long old_size = ptr ? (long)malloc_usable_size(ptr) : 0;
+    unsigned long long start = now_ns();
+    void* new_ptr = __libc_realloc(ptr, size);
+    unsigned long long elapsed = now_ns() - start;
+
+    if(s) {
+        s->reallocs++;
+        if((long)size > old_size) {
+            s->bytes += size - old_size;
+        }
+        // a failed realloc leaves the old block alive
+        long delta = (new_ptr || size == 0) ? (long)(new_ptr ? malloc_usable_size(new_ptr) : 0) - old_size : 0;
+        account(s, delta, elapsed);
+    }
+    return new_ptr;
+}
+
+// blocks from these are released through free(), so they must be counted too
+static void* aligned_alloc_impl(size_t alignment, size_t size, void* (*fn)(size_t, size_t)) {
+    struct thread_stats* s = stats();
+    unsigned long long start = now_ns();
+    void* ptr = fn(alignment, size);
+    unsigned long long elapsed = now_ns() - start;
+
+    if(s) {
+        s->aligned++;
+        s->bytes += size;
+        account(s, ptr ? (long)malloc_usable_size(ptr) : 0, elapsed);
+    }
+    return ptr;
+}
+
+static void* libc_memalign(size_t alignment, size_t size) {
+    return __libc_memalign(alignment, size);
+}
+
+static void* libc_valloc(size_t alignment, size_t size) {
+    (void)alignment;
+    return __libc_valloc(size);
+}
+
+static void* libc_pvalloc(size_t alignment, size_t size) {
+    (void)alignment;
+    return __libc_pvalloc(size);
+}
+
+void* memalign(size_t alignment, size_t size) {
+    return aligned_alloc_impl(alignment, size, libc_memalign);
+}
+
+void* aligned_alloc(size_t alignment, size_t size) {
+    return aligned_alloc_impl(alignment, size, libc_memalign);
+}
+
+void* valloc(size_t size) {
+    return aligned_alloc_impl(0, size, libc_valloc);
+}
+
+void* pvalloc(size_t size) {
+    return aligned_alloc_impl(0, size, libc_pvalloc);
+}
+
+int posix_memalign(void** result, size_t alignment, size_t size) {
+    if(alignment % sizeof(void*) != 0 || (alignment & (alignment - 1)) != 0 || alignment == 0) {
+        return EINVAL;
+    }
+
+    void* ptr = aligned_alloc_impl(alignment, size, libc_memalign);
+    if(!ptr && size != 0) {
+        return ENOMEM;
+    }
+
+    *result = ptr;
+    return 0;
+}
+
+void free(void* ptr) {
+    if(!ptr) {
+        return;
+    }
+
+    struct thread_stats* s = stats();
+    long size = (long)malloc_usable_size(ptr);
+    unsigned long long start = now_ns();
+    __libc_free(ptr);
+    unsigned long long elapsed = now_ns() - start;
+
+    if(s) {
+        s->frees++;
+        account(s, -size, elapsed);
+    }
+}
+
+__attribute__((constructor))
+static void alloc_profile_init(void) {
+    output_path = getenv("ALLOC_PROFILE_OUT");
+}
+
+__attribute__((destructor))
+static void alloc_profile_report(void) {
+    if(!output_path) {
+        return;
+    }
+
+    int fd = open(output_path, O_WRONLY | O_CREAT | O_TRUNC, 0644);
+    if(fd < 0) {
+        return;
+    }
+
+    int count = atomic_load(&used_slots);
+    if(count > MAX_THREADS) {
+        count = MAX_THREADS;
+    }
+
+    char line[512];
+    for(int i = 0; i < count; i++) {
+        struct thread_stats* s = &slots[i];
+        int len = snprintf(line, sizeof(line),
+            "{\"tid\": %ld, \"mallocs\": %lu, \"callocs\": %lu, \"reallocs\": %lu, \"aligned\": %lu, "
+            "\"frees\": %lu, \"bytes\": %lu, \"peak_live\": %ld, \"alloc_ns\": %llu}\n",
+            s->tid, s->mallocs, s->callocs, s->reallocs, s->aligned, s->frees,
+            s->bytes, s->peak_live, s->alloc_ns);
+        if(len > 0 && write(fd, line, len) < 0) {
+            break;
+        }
+    }
+
+    int dropped = atomic_load(&dropped_threads);
+    if(dropped > 0) {
+        int len = snprintf(line, sizeof(line), "{\"dropped_threads\": %d}\n", dropped);
+        if(len > 0 && write(fd, line, len) < 0) {
+            // nothing left to do, the process is exiting
+        }
+    }
+
+    close(fd);
+}
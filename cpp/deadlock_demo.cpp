@@ -18,6 +18,23 @@
 std::mutex mutex1, mutex2, mutex3;
 namespace fs = std::filesystem;
 
+// throughput counters for the stats line
+std::atomic<long long> bytes_decoded(0);
+std::atomic<long long> bytes_encoded(0);
+std::atomic<long long> pixels_transformed(0);
+
+
+// Structured stats for the controller: one "@@DBG_STATS {json}" line on stderr
+void print_stats(long long images_total, long long images_processed, long long images_failed) {
+    std::cerr << "@@DBG_STATS {"
+              << "\"images_total\": " << images_total
+              << ", \"images_processed\": " << images_processed
+              << ", \"images_failed\": " << images_failed
+              << ", \"bytes_decoded\": " << bytes_decoded
+              << ", \"bytes_encoded\": " << bytes_encoded
+              << ", \"pixels\": " << pixels_transformed
+              << "}" << std::endl;
+}
 
 void process(const std::vector<fs::path> files, const std::string& output_dir, std::atomic<int>& count_of_success, std::atomic<int>& count_of_failed, int thread_id) {
     for(const auto& file_path : files) {
@@ -50,6 +67,8 @@ void process(const std::vector<fs::path> files, const std::string& output_dir, s
         for(int i = 0; i < total_pixels; i++) {
             img[i] = 255 - img[i];
         }
+        bytes_decoded += total_pixels;
+        pixels_transformed += (long long)width * height;
 
         std::string filename = file_path.stem().string();
         std::string output_path = output_dir + "/inverted_" + filename + ".png";
@@ -63,6 +82,9 @@ void process(const std::vector<fs::path> files, const std::string& output_dir, s
             ++count_of_failed;
         } else {
             ++count_of_success;
+            std::error_code ec;
+            auto encoded = fs::file_size(output_path, ec);
+            if(!ec) bytes_encoded += encoded;
         }
         
         stbi_image_free(img);
@@ -138,5 +160,7 @@ int main(int argc, char** argv) {
         thread.join();
     }
 
+    print_stats(image_files.size(), success_count, fail_count);
+
     return 0;
 }   
\ No newline at end of file
@@ -17,9 +17,30 @@
 //std::mutex mtx;
 namespace fs = std::filesystem;
 
+// throughput counters, atomic so only the success/fail counters show the race
+std::atomic<long long> bytes_decoded(0);
+std::atomic<long long> bytes_encoded(0);
+std::atomic<long long> pixels_transformed(0);
+
 int success_count = 0;
 int fail_count = 0;
 
+// Structured stats for the controller: one "@@DBG_STATS {json}" line on stderr
+// images_total is the dataset size, the skipped/duplicated files are reported on their own
+void print_stats(long long images_total, long long images_processed, long long images_failed,
+                 long long images_skipped, long long images_duplicated) {
+    std::cerr << "@@DBG_STATS {"
+              << "\"images_total\": " << images_total
+              << ", \"images_processed\": " << images_processed
+              << ", \"images_failed\": " << images_failed
+              << ", \"images_skipped\": " << images_skipped
+              << ", \"images_duplicated\": " << images_duplicated
+              << ", \"bytes_decoded\": " << bytes_decoded
+              << ", \"bytes_encoded\": " << bytes_encoded
+              << ", \"pixels\": " << pixels_transformed
+              << "}" << std::endl;
+}
+
 void process(const std::vector<fs::path> files, const std::string& output_dir) {
     for(const auto& file_path : files) {
        
@@ -36,6 +57,8 @@ void process(const std::vector<fs::path> files, const std::string& output_dir) {
         for(int i = 0; i < total_pixels; i++) {
             img[i] = 255 - img[i];
         }
+        bytes_decoded += total_pixels;
+        pixels_transformed += (long long)width * height;
 
         std::string filename = file_path.stem().string();
         std::string output_path = output_dir + "/inverted_" + filename + ".png";
@@ -49,6 +72,9 @@ void process(const std::vector<fs::path> files, const std::string& output_dir) {
             ++fail_count;
         } else {
             ++success_count;
+            std::error_code ec;
+            auto encoded = fs::file_size(output_path, ec);
+            if(!ec) bytes_encoded += encoded;
         }
         
         stbi_image_free(img);
@@ -147,5 +173,7 @@ int main(int argc, char** argv) {
     int expected_total = image_files.size() + duplicated_files - skipped_files;
     std::cout << "Expected total (with duplicates): " << expected_total << std::endl;
 
+    print_stats(image_files.size(), success_count, fail_count, skipped_files, duplicated_files);
+
     return 0;
 }   
\ No newline at end of file
@@ -0,0 +1,82 @@
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+
+# Kept free of controller imports so a call costs only the interpreter start.
+# Usage: client.py [--socket PATH] [--json] <controller.py run options>
+# --json prints the raw event stream instead of the controller output.
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_SOCKET = BASE_DIR / "build" / "controller.sock"
+
+# the exporter belongs to the process that runs the demos, the daemon has its own
+DIRECT_ONLY_OPTIONS = ('--metrics-port', '--metrics-textfile')
+
+
+def run_direct(argv):
+    controller = str(Path(__file__).parent / "controller.py")
+    os.execv(sys.executable, [sys.executable, controller] + argv)
+
+
+def main():
+    argv = sys.argv[1:]
+    socket_path = str(DEFAULT_SOCKET)
+
+    if '--socket' in argv:
+        i = argv.index('--socket')
+        socket_path = argv[i + 1]
+        del argv[i:i + 2]
+
+    raw_json = '--json' in argv
+    if raw_json:
+        argv.remove('--json')
+
+    if any(arg.split('=', 1)[0] in DIRECT_ONLY_OPTIONS for arg in argv):
+        run_direct(argv)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        run_direct(argv)
+
+    exit_code = 0
+
+    with sock, sock.makefile('rwb') as stream:
+        stream.write((json.dumps({'argv': argv}) + '\n').encode('utf-8'))
+        stream.flush()
+
+        for line in stream:
+            event = json.loads(line)
+            kind = event.get('event')
+
+            if raw_json:
+                sys.stdout.write(line.decode('utf-8'))
+                sys.stdout.flush()
+                if kind == 'error':
+                    exit_code = 1
+                if kind in ('done', 'error'):
+                    break
+            elif kind == 'log':
+                sys.stdout.write(event['text'])
+                sys.stdout.flush()
+            elif kind == 'queued' and event.get('position', 0) > 0:
+                print(f"Queued behind {event['position']} job(s)...")
+            elif kind == 'error':
+                print(f"Daemon error: {event.get('message')}", file=sys.stderr)
+                exit_code = 1
+                break
+            elif kind == 'done':
+                break
+        else:
+            print("Daemon closed the connection", file=sys.stderr)
+            exit_code = 1
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
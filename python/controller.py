@@ -5,8 +5,15 @@ import argparse
 import sys
 import os
 import signal
+import json
+import shlex
 from typing import Optional
 
+from metrics_exporter import MetricsExporter
+from schedstat import SchedStatSampler
+from topology import AFFINITY_MODES, build_cpu_list, format_cpu_list
+from result_cache import ResultCache
+
 class ProgressBar:
     
     @staticmethod
@@ -37,17 +44,71 @@ class ProgressBar:
         sys.stdout.write(f"\r{text} ✅\n")
         sys.stdout.flush()
 
+STATS_PREFIX = "@@DBG_STATS "
+
 class SimpleController:
-    def __init__(self, threads=4, specific_files=None):
+    def __init__(self, threads=4, specific_files=None, exporter: Optional[MetricsExporter] = None, delay=1.0,
+                 affinity='none', affinity_sweep=False, alloc_profile=False,
+                 cache=False, fresh=False, cache_max_age=None, cache_max_entries=None):
         self.threads = threads
+        self.exporter = exporter
+        self.delay = delay
+        # what configure() falls back to when a job gives no --delay
+        self.default_delay = delay
+        self.affinity = affinity
+        self.affinity_sweep = affinity_sweep
+        self.alloc_profile = alloc_profile
+        self.fresh = fresh
+        self.on_result = None
         self.base_dir = Path(__file__).parent.parent
         self.build_dir = self.base_dir / "build"
+        self.alloc_profiler = self.build_dir / "liballoc_profile.so"
         self.results_dir = self.base_dir / "results"
         
         self.build_dir.mkdir(exist_ok=True)
         self.results_dir.mkdir(exist_ok=True)
         
+        # warm state, reused across configure() calls by the daemon
+        self._scan_cache = None
+        self._built = {}
+        self._result_cache = None
+        self.cache = None
+        self._setup_cache(cache, cache_max_age, cache_max_entries)
+        
+        self.files_to_compile = self._discover_demos(specific_files)
+        
+    def configure(self, threads, specific_files=None, delay=None, affinity='none', affinity_sweep=False,
+                  alloc_profile=False, cache=False, fresh=False, cache_max_age=None, cache_max_entries=None):
+        self.threads = threads
+        self.delay = delay if delay is not None else self.default_delay
+        self.affinity = affinity
+        self.affinity_sweep = affinity_sweep
+        self.alloc_profile = alloc_profile
+        self.fresh = fresh
+        self._setup_cache(cache, cache_max_age, cache_max_entries)
         self.files_to_compile = self._discover_demos(specific_files)
+    
+    def _setup_cache(self, enabled, max_age=None, max_entries=None):
+        if not enabled:
+            self.cache = None
+            return
+        
+        if self._result_cache is None:
+            self._result_cache = ResultCache(self.build_dir / "cache")
+        
+        self._result_cache.max_age = max_age
+        self._result_cache.max_entries = max_entries
+        self.cache = self._result_cache
+    
+    def _scan_cpp_dir(self):
+        cpp_dir = self.base_dir / "cpp"
+        mtime = cpp_dir.stat().st_mtime
+        
+        if self._scan_cache is None or self._scan_cache[0] != mtime:
+            sources = [cpp_file for cpp_file in cpp_dir.glob("*.cpp") if not cpp_file.name.startswith("stb_")]
+            self._scan_cache = (mtime, sources)
+        
+        return self._scan_cache[1]
         
     def _discover_demos(self, specific_files=None):
         cpp_dir = self.base_dir / "cpp"
@@ -66,10 +127,7 @@ class SimpleController:
                 else:
                     print(f"File not found: {cpp_file}")
         else:
-            for cpp_file in cpp_dir.glob("*.cpp"):
-                if cpp_file.name.startswith("stb_"):
-                    continue
-                    
+            for cpp_file in self._scan_cpp_dir():
                 file_name = cpp_file.stem
                 files_to_compile.append({
                     'name': file_name.replace('_', ' ').title(),
@@ -97,10 +155,16 @@ class SimpleController:
             target_path = file['program']
             
             need_compile = True
-            
-            if target_path.exists():
-                if target_path.stat().st_mtime > source_path.stat().st_mtime:
+            source_mtime = source_path.stat().st_mtime
+            
+            if self._built.get(source_path) == source_mtime and target_path.exists():
+                need_compile = False
+                status = "UP-TO-DATE (cached), skipping...."
+                skipped_count += 1
+            elif target_path.exists():
+                if target_path.stat().st_mtime > source_mtime:
                     need_compile = False
+                    self._built[source_path] = source_mtime
                     status = "UP-TO-DATE, skipping...."
                     skipped_count += 1
                 else:
@@ -128,6 +192,8 @@ class SimpleController:
                 
                 if result.returncode == 0:
                     print(f"Successfully compiled: {target_path.name}")
+                    compiled_count += 1
+                    self._built[source_path] = source_mtime
                 else:
                     print(f"Compile error in {target_path.name}:")
                     print(result.stderr)
@@ -139,6 +205,42 @@ class SimpleController:
         print(f"Total files: {total_files}")
         print(f"Compiled: {compiled_count}")
         print(f"Skipped (up-to-date): {skipped_count}\n")
+        
+        if self.alloc_profile:
+            self.compile_alloc_profiler()
+    
+    def compile_alloc_profiler(self) -> bool:
+        source_path = self.base_dir / "cpp" / "alloc_profile.c"
+        target_path = self.alloc_profiler
+        
+        if target_path.exists() and target_path.stat().st_mtime > source_path.stat().st_mtime:
+            return True
+        
+        cmd = [
+            'gcc',
+            '-shared',
+            '-fPIC',
+            '-O2',
+            '-pthread',
+            '-o',
+            str(target_path),
+            str(source_path)
+        ]
+        
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            
+            if result.returncode == 0:
+                print(f"Successfully compiled: {target_path.name}")
+                return True
+            
+            print(f"Compile error in {target_path.name}:")
+            print(result.stderr)
+            
+        except Exception as e:
+            print(f"Exception compiling {target_path.name}: {e}")
+        
+        return False
                 
     def check_deadlock_by_thread_states(self, pid: int) -> bool:
         try:
@@ -169,7 +271,24 @@ class SimpleController:
             print(f"Error checking thread states: {e}")
             return False
     
-    def run_single_demo(self, file, demo_num, total_demo):
+    def _sample_process(self, pid: int, start_time: float) -> dict:
+        sample = {'elapsed': time.time() - start_time}
+        
+        try:
+            with open(f"/proc/{pid}/stat", 'r') as f:
+                # comm may contain spaces, fields after it are fixed
+                stat = f.read().rsplit(')', 1)[1].split()
+            
+            ticks = os.sysconf('SC_CLK_TCK')
+            sample['cpu_time'] = (int(stat[11]) + int(stat[12])) / ticks
+            sample['threads'] = int(stat[17])
+            sample['rss_bytes'] = int(stat[21]) * os.sysconf('SC_PAGE_SIZE')
+        except (FileNotFoundError, ProcessLookupError, IndexError, ValueError):
+            pass
+        
+        return sample
+    
+    def run_single_demo(self, file, demo_num, total_demo, affinity='none'):
         print(f"\n=== Running: {file['name']} ===")
 
         if not file['program'].exists():
@@ -181,8 +300,26 @@ class SimpleController:
         BASE_TIMEOUT = 300 # if your programm slower than 5 minutes - fuck you!!!
         
         shell_cmd = ' '.join(cmd)
+        
+        alloc_output = None
+        if self.alloc_profile and self.alloc_profiler.exists():
+            alloc_output = self.results_dir / f"alloc_{file['program'].name}.jsonl"
+            alloc_output.unlink(missing_ok=True)
+            # set on the demo command only, perf and sh stay unprofiled
+            shell_cmd = (f"LD_PRELOAD={shlex.quote(str(self.alloc_profiler))} "
+                         f"ALLOC_PROFILE_OUT={shlex.quote(str(alloc_output))} {shell_cmd}")
+        
         perf_cmd = ["perf", "stat", "sh", "-c", shell_cmd]
         
+        cpus = build_cpu_list(affinity, self.threads)
+        print(f"Affinity: {affinity} (CPUs {format_cpu_list(cpus)})")
+        
+        def setup_child():
+            os.setsid()
+            # inherited by perf, the shell and the demo itself
+            if cpus:
+                os.sched_setaffinity(0, cpus)
+        
         start_time = time.time()
         
         try:
@@ -192,7 +329,7 @@ class SimpleController:
                 stderr=subprocess.PIPE,
                 text=True,
                 bufsize=1,
-                preexec_fn=os.setsid
+                preexec_fn=setup_child
             )
             
             pid = proc.pid
@@ -203,8 +340,10 @@ class SimpleController:
             
             target_pid = self._find_child_pid_simple(pid, file['program'].name)
             
+            sampler = None
             if target_pid:
                 print(f"Target PID ({file['program'].name}): {target_pid}")
+                sampler = SchedStatSampler(target_pid)
             else:
                 print(f"Could not find target PID, using shell PID")
                 target_pid = pid
@@ -216,6 +355,9 @@ class SimpleController:
             consecutive_deadlock_checks = 0
             
             while True:
+                if sampler:
+                    sampler.sample()
+                
                 if proc.poll() is not None:
                     print("Program finished normally")
                     break
@@ -230,6 +372,10 @@ class SimpleController:
                 if current_time - last_check_time > 0.5:
                     last_check_time = current_time
                     
+                    if self.exporter and target_pid:
+                        self.exporter.observe_live(file['name'], self.threads, self._sample_process(target_pid, start_time),
+                                                   affinity=affinity)
+                    
                     if target_pid and self.check_deadlock_by_thread_states(target_pid):
                         consecutive_deadlock_checks += 1
                         print(f"Threads blocked ({consecutive_deadlock_checks}/3 checks)")
@@ -278,6 +424,8 @@ class SimpleController:
             perf_metrics = self._parse_perf_output(perf_output)
             
             output = stdout + stderr
+            sched = sampler.summary() if sampler else None
+            alloc = self._read_alloc_profile(alloc_output) if alloc_output else None
             
         except Exception as e:
             print(f"Error: {e}")
@@ -304,7 +452,15 @@ class SimpleController:
                 print(f"DEADLOCK DETECTED BY TIMEOUT + LOW CPU")
                 deadlock_detected = True
         
-        data_race_detected = "DATA RACE" in output or "race" in output.lower()
+        stats = self._parse_stats(stderr, wall_time)
+        
+        if stats:
+            # skipped or repeated files the demo declared are planned, only work it can't account for is a race
+            data_race_detected = "DATA RACE" in output or stats['lost_updates'] != 0
+            work_mismatch_detected = stats['work_mismatch'] != 0
+        else:
+            data_race_detected = "DATA RACE" in output or "race" in output.lower()
+            work_mismatch_detected = False
         
         # Show Metrics
         print(f"\nResults:")
@@ -339,6 +495,38 @@ class SimpleController:
         if 'cpu_percent_total' in perf_metrics and 'system_cores' in perf_metrics:
             print(f"{'System usage:':<25} {perf_metrics['cpu_percent_total']:.1f}% of {perf_metrics['system_cores']} cores")
         
+        if sched and sched['threads']:
+            totals = sched['totals']
+            print(f"{'On-CPU time:':<25} {totals['on_cpu']:.3f} s")
+            print(f"{'Run-queue wait:':<25} {totals['wait']:.3f} s ({sched['wait_share'] * 100:.1f}% of all thread time)")
+            print(f"{'Blocked time:':<25} {totals['blocked']:.3f} s")
+            print(f"{'Timeslices:':<25} {totals['timeslices']}")
+            
+            if sched['oversubscribed']:
+                print(f"{'Warning:':<25} Oversubscribed - {len(sched['threads'])} threads on {sched['cpus_available']} CPUs, worker run-queue wait {sched['worker_wait_share'] * 100:.1f}% of worker time")
+        
+        if alloc:
+            totals = alloc['totals']
+            print(f"{'Allocations:':<25} {totals['calls']} calls, {totals['bytes'] / 1024**2:.1f} MB requested")
+            print(f"{'Peak live heap:':<25} {totals['peak_live'] / 1024**2:.1f} MB (sum of per-thread peaks)")
+            print(f"{'Allocator time:':<25} {totals['alloc_time']:.3f} s ({totals['avg_ns']:.0f} ns/call)")
+            
+            cpu_time = perf_metrics.get('cpu_time', 0) if perf_metrics else 0
+            if cpu_time > 0:
+                print(f"{'Allocator share:':<25} {totals['alloc_time'] / cpu_time * 100:.1f}% of CPU time")
+        
+        if stats:
+            print(f"{'Images:':<25} {stats['images_processed']} ok, {stats['images_failed']} failed of {stats['images_total']}"
+                  f" ({stats['images_skipped']} skipped, {stats['images_duplicated']} duplicated)")
+            print(f"{'Throughput:':<25} {stats['images_per_sec']:.2f} images/s")
+            print(f"{'Decoded / encoded:':<25} {stats['decoded_mb_per_sec']:.1f} / {stats['encoded_mb_per_sec']:.1f} MB/s")
+            print(f"{'Pixels:':<25} {stats['mpixels_per_sec']:.1f} Mpixel/s")
+            
+            if stats['work_mismatch']:
+                print(f"{'Work mismatch:':<25} {stats['work_mismatch']} (counters disagree with the dataset size)")
+            if stats['lost_updates']:
+                print(f"{'Lost updates:':<25} {stats['lost_updates']} (counters disagree with the work the demo planned)")
+        
         print(f"\n{'Detections:':<25}", end="")
         if data_race_detected:
             print("🔴 DATA RACE", end=" ")
@@ -346,13 +534,15 @@ class SimpleController:
             print("🔴 DEADLOCK", end=" ")
         if timeout_occurred and not deadlock_detected:
             print("⏰ TIMEOUT", end=" ")
-        if not data_race_detected and not deadlock_detected and not timeout_occurred:
+        if work_mismatch_detected:
+            print("🟡 WORK MISMATCH", end=" ")
+        if not data_race_detected and not deadlock_detected and not timeout_occurred and not work_mismatch_detected:
             print("✅ OK", end="")
         print()
         
         print("-"*50)
         
-        return {
+        result = {
             'name': file['name'],
             'exit_code': return_code,
             'stdout': stdout,
@@ -361,9 +551,82 @@ class SimpleController:
             'metrics': perf_metrics,
             'deadlock': deadlock_detected,
             'data_race': data_race_detected,
-            'timeout': timeout_occurred
+            'work_mismatch': work_mismatch_detected,
+            'timeout': timeout_occurred,
+            'sched': sched,
+            'affinity': {'mode': affinity, 'cpus': cpus},
+            'alloc': alloc,
+            'stats': stats
         }
+        
+        return result
 
+    def _parse_stats(self, output: str, wall_time: float) -> Optional[dict]:
+        stats = None
+        
+        for line in output.splitlines():
+            if line.startswith(STATS_PREFIX):
+                try:
+                    candidate = json.loads(line[len(STATS_PREFIX):])
+                except ValueError:
+                    candidate = None
+                
+                if isinstance(candidate, dict):
+                    stats = candidate
+                else:
+                    print(f"Malformed stats line: {line}")
+        
+        if stats is None:
+            return None
+        
+        # user demos emit this line too, anything that is not a number means "no stats"
+        try:
+            for key in ('images_total', 'images_processed', 'images_failed', 'images_skipped', 'images_duplicated',
+                        'bytes_decoded', 'bytes_encoded', 'pixels'):
+                stats[key] = int(stats.get(key, 0))
+        except (TypeError, ValueError, OverflowError):
+            print(f"Malformed stats values: {stats}")
+            return None
+        
+        counted = stats['images_processed'] + stats['images_failed']
+        stats['work_mismatch'] = stats['images_total'] - counted
+        stats['lost_updates'] = stats['images_total'] - stats['images_skipped'] + stats['images_duplicated'] - counted
+        
+        seconds = wall_time if wall_time > 0 else float('inf')
+        stats['images_per_sec'] = stats['images_processed'] / seconds
+        stats['decoded_mb_per_sec'] = stats['bytes_decoded'] / 1024**2 / seconds
+        stats['encoded_mb_per_sec'] = stats['bytes_encoded'] / 1024**2 / seconds
+        stats['mpixels_per_sec'] = stats['pixels'] / 1e6 / seconds
+        
+        return stats
+    
+    def _read_alloc_profile(self, path) -> Optional[dict]:
+        threads = []
+        dropped = 0
+        
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if 'dropped_threads' in entry:
+                        dropped = entry['dropped_threads']
+                    else:
+                        threads.append(entry)
+        except (FileNotFoundError, ValueError):
+            # killed demos (deadlock, timeout) never reach the exit handler
+            return None
+        
+        for thread in threads:
+            thread['calls'] = (thread['mallocs'] + thread['callocs'] + thread['reallocs'] + thread.get('aligned', 0)
+                               + thread['frees'])
+            thread['alloc_time'] = thread['alloc_ns'] / 1e9
+            thread['avg_ns'] = thread['alloc_ns'] / thread['calls'] if thread['calls'] else 0
+        
+        totals = {key: sum(t[key] for t in threads) for key in ('calls', 'bytes', 'peak_live', 'alloc_ns', 'alloc_time')}
+        totals['avg_ns'] = totals['alloc_ns'] / totals['calls'] if totals['calls'] else 0
+        
+        return {'threads': threads, 'totals': totals, 'dropped_threads': dropped}
+    
     def _find_child_pid_simple(self, parent_pid: int, program_name: str) -> Optional[int]:
         try:
             children_path = f"/proc/{parent_pid}/task/{parent_pid}/children"
@@ -468,20 +731,54 @@ class SimpleController:
         print("Run all demos")
         
         results = []
-        total_demos = len(self.files_to_compile)
+        modes = AFFINITY_MODES if self.affinity_sweep else [self.affinity]
+        runs = [(file, mode) for file in self.files_to_compile for mode in modes]
+        total_demos = len(runs)
         
-        for i, file in enumerate(self.files_to_compile, 1):
+        for i, (file, mode) in enumerate(runs, 1):
             ProgressBar.show(i, total_demos, prefix='[System] Progress:', suffix=f'Demo {i}/{total_demos}')
             
-            result = self.run_single_demo(file, i, total_demos)
+            cache_key = self._cache_key(file, mode)
+            result = None
+            
+            if cache_key and not self.fresh:
+                result = self.cache.get(cache_key)
+                if result:
+                    print(f"\n=== Cached: {file['name']} (affinity: {mode}) ===")
+                    print(f"Inputs unchanged, reusing result from {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(result['cached_at']))}")
+            
+            if result is None:
+                result = self.run_single_demo(file, i, total_demos, affinity=mode)
+                
+                # killed runs are not a measurement worth reusing
+                if result and cache_key and not result['deadlock'] and not result['timeout']:
+                    self.cache.put(cache_key, result)
+            
             if result:
                 results.append(result)
+                # cached results too, so they don't vanish from the exporter
+                if self.exporter:
+                    self.exporter.record_result(result, self.threads)
+                if self.on_result:
+                    self.on_result(result)
                 
-            if i < total_demos:
-                time.sleep(1)
+            if i < total_demos and self.delay > 0 and not (result and result.get('cached')):
+                time.sleep(self.delay)
             
         return results
     
+    def _cache_key(self, file, affinity) -> Optional[str]:
+        if not self.cache or not file['program'].exists():
+            return None
+        
+        options = {
+            'affinity': affinity,
+            'cpus': build_cpu_list(affinity, self.threads),
+            'alloc_profile': self.alloc_profile,
+        }
+        # demos read ./dataset relative to where they are started
+        return self.cache.key(file['program'], file['args'], self.threads, Path.cwd() / "dataset", options)
+    
     def generate_report(self, results):
         print("=== Report ===")
         
@@ -495,7 +792,11 @@ class SimpleController:
             
             for result in results:
                 f.write(f"Demo: {result['name']}\n")
-                f.write(f"Status: {'SUCCESS' if result['exit_code'] == 0 else 'ERROR'}\n")
+                f.write(f"Status: {'SUCCESS' if result['exit_code'] == 0 else 'ERROR'}"
+                        f"{' (cached)' if result.get('cached') else ''}\n")
+                
+                affinity = result.get('affinity', {})
+                f.write(f"Affinity: {affinity.get('mode', 'none')} (CPUs {format_cpu_list(affinity.get('cpus'))})\n")
                 
                 metrics = result.get('metrics', {})
                 
@@ -514,15 +815,54 @@ class SimpleController:
                 if 'max_threads' in metrics:
                     f.write(f"Max threads: {metrics['max_threads']}\n")
                 
+                sched = result.get('sched')
+                if sched and sched['threads']:
+                    f.write(f"Scheduler (on-CPU / run-queue wait / blocked, {sched['cpus_available']} CPUs):\n")
+                    for thread in sched['threads']:
+                        f.write(f"  {thread['tid']:>7} {thread['comm']:<16} "
+                                f"{thread['on_cpu']:8.3f}s / {thread['wait']:8.3f}s / {thread['blocked']:8.3f}s "
+                                f"({thread['timeslices']} slices)\n")
+                    if sched['oversubscribed']:
+                        f.write(f"Oversubscribed: worker run-queue wait {sched['worker_wait_share'] * 100:.1f}% of worker time\n")
+                
+                alloc = result.get('alloc')
+                if alloc:
+                    f.write("Allocator (calls / MB requested / peak live MB / time / ns per call):\n")
+                    for thread in alloc['threads']:
+                        f.write(f"  {thread['tid']:>7} {thread['calls']:>9} {thread['bytes'] / 1024**2:9.1f} "
+                                f"{thread['peak_live'] / 1024**2:9.1f} {thread['alloc_time']:8.3f}s {thread['avg_ns']:7.0f}\n")
+                    totals = alloc['totals']
+                    f.write(f"  {'total':>7} {totals['calls']:>9} {totals['bytes'] / 1024**2:9.1f} "
+                            f"{totals['peak_live'] / 1024**2:9.1f} {totals['alloc_time']:8.3f}s {totals['avg_ns']:7.0f}\n")
+                    if alloc['dropped_threads']:
+                        f.write(f"  {alloc['dropped_threads']} thread(s) not tracked (slot limit)\n")
+                
+                stats = result.get('stats')
+                if stats:
+                    f.write(f"Images: {stats['images_processed']} ok, {stats['images_failed']} failed of {stats['images_total']} "
+                            f"({stats['images_skipped']} skipped, {stats['images_duplicated']} duplicated)\n")
+                    f.write(f"Throughput: {stats['images_per_sec']:.2f} images/s, "
+                            f"{stats['decoded_mb_per_sec']:.1f} MB/s decoded, {stats['encoded_mb_per_sec']:.1f} MB/s encoded, "
+                            f"{stats['mpixels_per_sec']:.1f} Mpixel/s\n")
+                    if stats['work_mismatch']:
+                        f.write(f"Work mismatch: {stats['work_mismatch']} vs dataset size\n")
+                    if stats['lost_updates']:
+                        f.write(f"Lost updates: {stats['lost_updates']}\n")
+                
                 output = result['stdout'] + result['stderr']
-                if "DATA RACE" in output:
+                if result.get('data_race'):
                     f.write("Detected data race\n")
+                if result.get('work_mismatch'):
+                    f.write("Detected work mismatch\n")
                 if "DEADLOCK" in output:
                     f.write("Detected deadlock\n")
                 if "No data race" in output:
                     f.write("Okay\n")
                 
                 f.write("\n")
+            
+            if self.affinity_sweep:
+                f.write(self._affinity_comparison(results))
         
         print(f"Report was seved in: {report_path}")
         
@@ -537,32 +877,98 @@ class SimpleController:
             if 'cpus_utilized' in result.get('metrics', {}):
                 cpu_info = f", CPU: {result['metrics']['cpus_utilized']:.1f} cores"
             
-            print(f"{status} {name:25} {duration:6.2f}s{cpu_info}")        
+            cached_info = " (cached)" if result.get('cached') else ""
+            
+            print(f"{status} {name:25} {duration:6.2f}s{cpu_info}{cached_info}")        
+            
+    def _affinity_comparison(self, results) -> str:
+        lines = ["Affinity comparison", "="*50]
+        lines.append(f"{'Demo':<20} {'Mode':<14} {'CPUs':<12} {'Wall':>8} {'Parallel':>9} {'Efficiency':>11}")
+        
+        for result in results:
+            affinity = result.get('affinity', {})
+            metrics = result.get('metrics', {})
+            parallelism = metrics.get('cpu_time', 0) / result['runtime'] if result['runtime'] > 0 else 0
+            efficiency = (parallelism / self.threads) * 100 if self.threads > 0 else 0
             
-    def main(self):
+            lines.append(f"{result['name']:<20} {affinity.get('mode', 'none'):<14} "
+                         f"{format_cpu_list(affinity.get('cpus')):<12} {result['runtime']:7.3f}s "
+                         f"{parallelism:8.2f}x {efficiency:10.1f}%")
+        
+        return '\n'.join(lines) + '\n'
+    
+    def main(self, compile_only=False):
         self.compile_cpp()
         
+        if compile_only:
+            return []
+        
         results = self.run_all_demos()
         
         if results:
             self.generate_report(results)
+            
+            if self.affinity_sweep:
+                print()
+                print(self._affinity_comparison(results))
         
-def main():
-    parser = argparse.ArgumentParser()
+        return results
+
+def add_run_arguments(parser):
     parser.add_argument('--threads', '-t', type=int, default=4, help='Number of threads(default: 4)')
     parser.add_argument('--file', '-f', action='append', help='Specific .cpp file to run (without .cpp extension)')
     parser.add_argument('--compile-only', action='store_true', help='Only compile, don\'t run')
+    parser.add_argument('--delay', type=float, help='Pause between demos in seconds (default: 1, 0 for serve)')
+    parser.add_argument('--affinity', choices=AFFINITY_MODES, default='none',
+                        help='Pin demo threads to CPUs built from the CPU topology (default: none)')
+    parser.add_argument('--affinity-sweep', action='store_true', help='Run every demo once per affinity mode and compare')
+    parser.add_argument('--alloc-profile', action='store_true',
+                        help='Preload an allocation profiler into the demos and report per-thread heap usage')
+    parser.add_argument('--cache', action='store_true', help='Reuse stored results when binary, arguments, dataset and host are unchanged')
+    parser.add_argument('--fresh', action='store_true', help='With --cache: re-measure everything and refresh the stored results')
+    parser.add_argument('--cache-max-age', type=float, default=168, help='Drop cached results older than this many hours (default: 168)')
+    parser.add_argument('--cache-max-entries', type=int, default=500, help='Keep at most this many cached results (default: 500)')
+
+def cache_options(args) -> dict:
+    return {
+        'cache': args.cache,
+        'fresh': args.fresh,
+        'cache_max_age': args.cache_max_age * 3600,
+        'cache_max_entries': args.cache_max_entries,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', nargs='?', choices=['run', 'serve'], default='run',
+                        help='run demos directly (default) or start the controller daemon')
+    add_run_arguments(parser)
+    parser.add_argument('--socket', help='Unix socket of the daemon (default: build/controller.sock)')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics on this local port while demos run')
+    parser.add_argument('--metrics-textfile', help='Write Prometheus metrics to this file (node_exporter textfile collector)')
     
     args = parser.parse_args()
     
-    controller = SimpleController(threads=args.threads, specific_files=args.file)
-    controller.compile_cpp()
+    exporter = None
+    if args.metrics_port is not None or args.metrics_textfile:
+        exporter = MetricsExporter(port=args.metrics_port, textfile=args.metrics_textfile)
+        exporter.start()
     
-    if not args.compile_only:
-        results = controller.run_all_demos()
-        
-        if results:
-            controller.generate_report(results)
+    try:
+        if args.command == 'serve':
+            from daemon import ControllerDaemon
+            
+            delay = args.delay if args.delay is not None else 0.0
+            controller = SimpleController(threads=args.threads, exporter=exporter, delay=delay)
+            ControllerDaemon(controller, socket_path=args.socket).serve_forever()
+        else:
+            delay = args.delay if args.delay is not None else 1.0
+            controller = SimpleController(threads=args.threads, specific_files=args.file, exporter=exporter, delay=delay,
+                                          affinity=args.affinity, affinity_sweep=args.affinity_sweep,
+                                          alloc_profile=args.alloc_profile, **cache_options(args))
+            controller.main(compile_only=args.compile_only)
+    finally:
+        if exporter:
+            exporter.stop()
             
 if __name__ == "__main__":
     main()
\ No newline at end of file
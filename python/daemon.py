@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Optional
+
+from controller import SimpleController, add_run_arguments, cache_options
+
+# Protocol: the client sends one JSON line {"argv": [...]} with the same run
+# options controller.py accepts, the daemon answers with JSON lines:
+#   {"event": "queued", "position": N}
+#   {"event": "log", "text": "..."}        everything the controller prints
+#   {"event": "result", "result": {...}}   one per finished demo
+#   {"event": "done", "results": N}  or  {"event": "error", "message": "..."}
+
+
+class _EventWriter:
+
+    def __init__(self, events: queue.Queue):
+        self.events = events
+        self.buffer = ''
+
+    def write(self, text):
+        self.buffer += text
+        if '\n' in self.buffer:
+            complete, self.buffer = self.buffer.rsplit('\n', 1)
+            self.events.put({'event': 'log', 'text': complete + '\n'})
+        return len(text)
+
+    def flush(self):
+        if self.buffer:
+            self.events.put({'event': 'log', 'text': self.buffer})
+            self.buffer = ''
+
+
+class _Job:
+
+    def __init__(self, argv):
+        self.argv = argv
+        self.events = queue.Queue()
+
+
+class ControllerDaemon:
+
+    def __init__(self, controller: SimpleController, socket_path: Optional[str] = None):
+        self.controller = controller
+        self.socket_path = Path(socket_path) if socket_path else controller.build_dir / "controller.sock"
+        self.jobs = queue.Queue()
+        self.busy = False
+        self.parser = argparse.ArgumentParser(prog='controller.py', add_help=False)
+        add_run_arguments(self.parser)
+
+    def serve_forever(self):
+        # demos open ./dataset and ./results relative to the working directory
+        os.chdir(self.controller.base_dir)
+
+        if self.socket_path.exists():
+            # only a socket nobody answers on is left over from a dead daemon
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(self.socket_path))
+            except ConnectionRefusedError:
+                self.socket_path.unlink()
+            else:
+                print(f"Error: another daemon is already listening on {self.socket_path}")
+                sys.exit(1)
+            finally:
+                probe.close()
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                daemon._handle_client(self.rfile, self.wfile)
+
+        worker = threading.Thread(target=self._worker, daemon=True)
+        worker.start()
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+        with socketserver.ThreadingUnixStreamServer(str(self.socket_path), Handler) as server:
+            print(f"Controller daemon listening on {self.socket_path}")
+            try:
+                server.serve_forever()
+            except (KeyboardInterrupt, SystemExit):
+                print("\nStopping daemon")
+            finally:
+                self.socket_path.unlink(missing_ok=True)
+
+    def _handle_client(self, rfile, wfile):
+        line = rfile.readline()
+        if not line:
+            # connected and went away without a request, e.g. another daemon checking the socket
+            return
+
+        try:
+            request = json.loads(line)
+            argv = [str(arg) for arg in request.get('argv', [])]
+        except (ValueError, AttributeError) as e:
+            self._send(wfile, {'event': 'error', 'message': f"Bad request: {e}"})
+            return
+
+        metrics_options = [arg for arg in argv if arg.split('=', 1)[0] in ('--metrics-port', '--metrics-textfile')]
+        if metrics_options:
+            self._send(wfile, {'event': 'error',
+                               'message': f"{metrics_options[0].split('=', 1)[0]} is not supported via the daemon, "
+                                          f"start it with `controller.py serve --metrics-port ...` instead"})
+            return
+
+        job = _Job(argv)
+        # the running job is ahead of us as well
+        self._send(wfile, {'event': 'queued', 'position': self.jobs.qsize() + (1 if self.busy else 0)})
+        self.jobs.put(job)
+
+        while True:
+            event = job.events.get()
+            try:
+                self._send(wfile, event)
+            except (BrokenPipeError, ConnectionResetError):
+                # the job keeps running, its output is simply dropped
+                return
+
+            if event['event'] in ('done', 'error'):
+                return
+
+    @staticmethod
+    def _send(wfile, event):
+        wfile.write((json.dumps(event, default=str) + '\n').encode('utf-8'))
+        wfile.flush()
+
+    def _worker(self):
+        while True:
+            job = self.jobs.get()
+            self.busy = True
+            writer = _EventWriter(job.events)
+            self.controller.on_result = lambda result: job.events.put({'event': 'result', 'result': result})
+
+            try:
+                with redirect_stdout(writer), redirect_stderr(writer):
+                    args = self.parser.parse_args(job.argv)
+                    self.controller.configure(args.threads, args.file, args.delay,
+                                              affinity=args.affinity, affinity_sweep=args.affinity_sweep,
+                                              alloc_profile=args.alloc_profile, **cache_options(args))
+                    results = self.controller.main(compile_only=args.compile_only)
+                    writer.flush()
+
+                job.events.put({'event': 'done', 'results': len(results)})
+
+            except SystemExit:
+                job.events.put({'event': 'error', 'message': f"Invalid arguments: {' '.join(job.argv)}"})
+            except Exception as e:
+                job.events.put({'event': 'error', 'message': f"{type(e).__name__}: {e}"})
+            finally:
+                self.controller.on_result = None
+                self.busy = False
@@ -0,0 +1,182 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+PREFIX = "dbg_threads"
+
+# name -> (type, help)
+METRICS = {
+    'runs_total': ('counter', 'Finished demo runs'),
+    'deadlocks_total': ('counter', 'Runs where a deadlock was detected'),
+    'data_races_total': ('counter', 'Runs where a data race was detected'),
+    'work_mismatches_total': ('counter', 'Runs whose counters did not add up to the dataset size'),
+    'timeouts_total': ('counter', 'Runs killed by the global timeout'),
+    'cached_results_total': ('counter', 'Results reused from the result cache instead of running the demo'),
+    'wall_time_seconds': ('gauge', 'Wall time of the last run'),
+    'cpu_time_seconds': ('gauge', 'CPU time (user + sys) of the last run'),
+    'cpus_utilized': ('gauge', 'CPUs utilized reported by perf for the last run'),
+    'parallelism': ('gauge', 'CPU time / wall time of the last run'),
+    'thread_efficiency_ratio': ('gauge', 'Parallelism / requested threads of the last run'),
+    'images_per_second': ('gauge', 'Images processed per second in the last run'),
+    'decoded_mb_per_second': ('gauge', 'Decoded image data (MB/s) in the last run'),
+    'encoded_mb_per_second': ('gauge', 'Encoded PNG output (MB/s) in the last run'),
+    'mpixels_per_second': ('gauge', 'Pixels transformed (Mpixel/s) in the last run'),
+    'work_mismatch': ('gauge', 'Dataset size minus the images the demo counted in the last run'),
+    'lost_updates': ('gauge', 'Planned work items missing from the demo counters in the last run'),
+    'exit_code': ('gauge', 'Exit code of the last run (-1 deadlock, -2 timeout)'),
+    'demo_running': ('gauge', '1 while the demo is running'),
+    'live_elapsed_seconds': ('gauge', 'Seconds since the running demo was started'),
+    'live_threads': ('gauge', 'Current thread count of the running demo'),
+    'live_cpu_seconds': ('gauge', 'CPU time consumed so far by the running demo'),
+    'live_rss_bytes': ('gauge', 'Resident memory of the running demo'),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsExporter:
+
+    def __init__(self, port: Optional[int] = None, textfile: Optional[str] = None, host: str = '127.0.0.1'):
+        self.port = port
+        self.host = host
+        self.textfile = Path(textfile) if textfile else None
+        self._values: Dict[str, Dict[Labels, float]] = {name: {} for name in METRICS}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        if self.port is None:
+            return
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"Metrics available at http://{self.host}:{self._server.server_port}/metrics")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self._write_textfile()
+
+    @staticmethod
+    def _labels(demo: str, threads: int, affinity: str = 'none') -> Labels:
+        return (('demo', demo), ('threads', str(threads)), ('affinity', affinity))
+
+    def _set(self, name: str, labels: Labels, value: float):
+        with self._lock:
+            self._values[name][labels] = value
+
+    def _inc(self, name: str, labels: Labels, value: float = 1):
+        with self._lock:
+            self._values[name][labels] = self._values[name].get(labels, 0) + value
+
+    def observe_live(self, demo: str, threads: int, sample: dict, affinity: str = 'none'):
+        labels = self._labels(demo, threads, affinity)
+        self._set('demo_running', labels, 1)
+
+        for key, name in (('elapsed', 'live_elapsed_seconds'),
+                          ('threads', 'live_threads'),
+                          ('cpu_time', 'live_cpu_seconds'),
+                          ('rss_bytes', 'live_rss_bytes')):
+            if key in sample:
+                self._set(name, labels, sample[key])
+
+        self._write_textfile()
+
+    def record_result(self, result: dict, threads: int):
+        labels = self._labels(result['name'], threads, result.get('affinity', {}).get('mode', 'none'))
+        metrics = result.get('metrics') or {}
+
+        # nothing was measured, the last-run gauges and run counters keep describing real runs
+        if result.get('cached'):
+            self._inc('cached_results_total', labels)
+            self._write_textfile()
+            return
+
+        self._set('demo_running', labels, 0)
+        self._set('wall_time_seconds', labels, result.get('runtime', 0))
+        self._set('exit_code', labels, result.get('exit_code', 0))
+        self._set('cpu_time_seconds', labels, metrics.get('cpu_time', 0))
+        self._set('cpus_utilized', labels, metrics.get('cpus_utilized', 0))
+
+        parallelism = metrics.get('parallelism', 0)
+        self._set('parallelism', labels, parallelism)
+        if threads > 0:
+            self._set('thread_efficiency_ratio', labels, parallelism / threads)
+
+        stats = result.get('stats')
+        if stats:
+            self._set('images_per_second', labels, stats['images_per_sec'])
+            self._set('decoded_mb_per_second', labels, stats['decoded_mb_per_sec'])
+            self._set('encoded_mb_per_second', labels, stats['encoded_mb_per_sec'])
+            self._set('mpixels_per_second', labels, stats['mpixels_per_sec'])
+            self._set('work_mismatch', labels, stats['work_mismatch'])
+            self._set('lost_updates', labels, stats['lost_updates'])
+
+        self._inc('runs_total', labels)
+        # touch the detection counters so they are exported as 0 before the first hit
+        self._inc('deadlocks_total', labels, 1 if result.get('deadlock') else 0)
+        self._inc('data_races_total', labels, 1 if result.get('data_race') else 0)
+        self._inc('work_mismatches_total', labels, 1 if result.get('work_mismatch') else 0)
+        self._inc('timeouts_total', labels, 1 if result.get('timeout') else 0)
+
+        self._write_textfile()
+
+    def render(self) -> str:
+        lines = []
+
+        with self._lock:
+            for name, (metric_type, help_text) in METRICS.items():
+                series = self._values[name]
+                if not series:
+                    continue
+
+                full_name = f"{PREFIX}_{name}"
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} {metric_type}")
+
+                for labels, value in sorted(series.items()):
+                    label_str = ','.join(f'{k}="{self._escape(v)}"' for k, v in labels)
+                    lines.append(f"{full_name}{{{label_str}}} {float(value)!r}")
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def _write_textfile(self):
+        if not self.textfile:
+            return
+
+        # node_exporter may read the file at any moment, so never expose a half-written one
+        tmp_path = self.textfile.with_name(f".{self.textfile.name}.{os.getpid()}.tmp")
+        try:
+            self.textfile.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(self.render(), encoding='utf-8')
+            os.replace(tmp_path, self.textfile)
+        except OSError as e:
+            print(f"Error writing metrics textfile: {e}")
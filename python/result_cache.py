@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+CACHE_VERSION = 1
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dataset_fingerprint(dataset_dir: Path) -> str:
+    # names, sizes and mtimes are enough to notice added, removed or replaced images
+    digest = hashlib.sha256()
+    if dataset_dir.is_dir():
+        for path in sorted(dataset_dir.iterdir()):
+            if path.is_file():
+                stat = path.stat()
+                digest.update(f"{path.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def host_fingerprint() -> dict:
+    model = 'unknown'
+    try:
+        with open("/proc/cpuinfo", 'r') as f:
+            for line in f:
+                if line.startswith("model name"):
+                    model = line.split(':', 1)[1].strip()
+                    break
+    except OSError:
+        pass
+
+    return {'cpu_model': model, 'cpu_count': os.cpu_count()}
+
+
+class ResultCache:
+
+    def __init__(self, cache_dir: Path, max_age: Optional[float] = None, max_entries: Optional[int] = None):
+        self.cache_dir = Path(cache_dir)
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._hashes = {}
+        self.host = host_fingerprint()
+
+    def _binary_hash(self, program: Path) -> str:
+        # the daemon asks for the same binaries over and over, rehash only when they change
+        stat = program.stat()
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._hashes.get(program)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        digest = file_sha256(program)
+        self._hashes[program] = (signature, digest)
+        return digest
+
+    def key(self, program: Path, args, threads: int, dataset_dir: Path, options: dict) -> str:
+        material = {
+            'version': CACHE_VERSION,
+            'binary': self._binary_hash(program),
+            'args': list(args),
+            'threads': threads,
+            'dataset': dataset_fingerprint(dataset_dir),
+            'host': self.host,
+            'options': options,
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            entry = None
+
+        # a truncated or hand-edited entry is a miss, drop it so the next run stores a fresh one
+        if (not isinstance(entry, dict) or not isinstance(entry.get('result'), dict)
+                or not isinstance(entry.get('stored_at', 0), (int, float))):
+            path.unlink(missing_ok=True)
+            return None
+
+        if self.max_age is not None and time.time() - entry.get('stored_at', 0) > self.max_age:
+            path.unlink(missing_ok=True)
+            return None
+
+        result = entry['result']
+        result['cached'] = True
+        result['cached_at'] = entry.get('stored_at')
+        return result
+
+    def put(self, key: str, result: dict):
+        entry = {'stored_at': time.time(), 'result': result}
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix('.tmp')
+
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing result cache: {e}")
+            return
+
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+
+        entries.sort()
+        now = time.time()
+
+        if self.max_age is not None:
+            expired = [path for mtime, path in entries if now - mtime > self.max_age]
+            for path in expired:
+                path.unlink(missing_ok=True)
+            entries = [(mtime, path) for mtime, path in entries if now - mtime <= self.max_age]
+
+        if self.max_entries is not None and len(entries) > self.max_entries:
+            for _, path in entries[:len(entries) - self.max_entries]:
+                path.unlink(missing_ok=True)
@@ -0,0 +1,109 @@
+import os
+from typing import Dict
+
+# Run-queue wait has to be the largest off-CPU component and at least this
+# share of the threads' lifetime before a run is flagged as oversubscribed.
+RUNQUEUE_DOMINANT_SHARE = 0.10
+
+
+class SchedStatSampler:
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.ticks = os.sysconf('SC_CLK_TCK')
+        self.threads: Dict[int, dict] = {}
+        self.cpus_available = os.cpu_count()
+
+    def sample(self):
+        task_dir = f"/proc/{self.pid}/task"
+
+        try:
+            with open("/proc/uptime", 'r') as f:
+                uptime = float(f.read().split()[0])
+            tids = os.listdir(task_dir)
+            self.cpus_available = len(os.sched_getaffinity(self.pid))
+        except (OSError, ValueError):
+            return
+
+        for tid in tids:
+            try:
+                with open(f"{task_dir}/{tid}/schedstat", 'r') as f:
+                    on_cpu_ns, wait_ns, timeslices = (int(v) for v in f.read().split()[:3])
+            except (FileNotFoundError, ProcessLookupError, ValueError):
+                continue
+
+            thread = self.threads.get(int(tid))
+            if thread is None:
+                thread = self._new_thread(task_dir, tid)
+                if thread is None:
+                    continue
+                self.threads[int(tid)] = thread
+
+            # counters are cumulative, the last sample before exit wins
+            thread['on_cpu'] = on_cpu_ns / 1e9
+            thread['wait'] = wait_ns / 1e9
+            thread['timeslices'] = timeslices
+            thread['lifetime'] = max(0.0, uptime - thread['start'])
+
+    def _new_thread(self, task_dir: str, tid: str):
+        try:
+            with open(f"{task_dir}/{tid}/stat", 'r') as f:
+                content = f.read()
+        except (FileNotFoundError, ProcessLookupError):
+            return None
+
+        comm = content[content.find('(') + 1:content.rfind(')')]
+        fields = content.rsplit(')', 1)[1].split()
+
+        return {
+            'tid': int(tid),
+            'comm': comm,
+            'start': int(fields[19]) / self.ticks,
+        }
+
+    def summary(self) -> dict:
+        per_thread = []
+        totals = {'on_cpu': 0.0, 'wait': 0.0, 'blocked': 0.0, 'lifetime': 0.0, 'timeslices': 0}
+
+        for tid in sorted(self.threads):
+            thread = self.threads[tid]
+            if 'on_cpu' not in thread:
+                continue
+
+            # starttime has clock-tick resolution, so never report negative blocked time
+            blocked = max(0.0, thread['lifetime'] - thread['on_cpu'] - thread['wait'])
+
+            per_thread.append({
+                'tid': tid,
+                'comm': thread['comm'],
+                'on_cpu': thread['on_cpu'],
+                'wait': thread['wait'],
+                'blocked': blocked,
+                'timeslices': thread['timeslices'],
+            })
+
+            totals['on_cpu'] += thread['on_cpu']
+            totals['wait'] += thread['wait']
+            totals['blocked'] += blocked
+            totals['lifetime'] += thread['lifetime']
+            totals['timeslices'] += thread['timeslices']
+
+        accounted = totals['on_cpu'] + totals['wait'] + totals['blocked']
+        wait_share = totals['wait'] / accounted if accounted > 0 else 0.0
+
+        # the main thread usually just sits in join(), judge the workers only
+        workers = [t for t in per_thread if t['tid'] != self.pid] or per_thread
+        worker_wait = sum(t['wait'] for t in workers)
+        worker_blocked = sum(t['blocked'] for t in workers)
+        worker_accounted = sum(t['on_cpu'] for t in workers) + worker_wait + worker_blocked
+        worker_wait_share = worker_wait / worker_accounted if worker_accounted > 0 else 0.0
+
+        return {
+            'threads': per_thread,
+            'totals': totals,
+            'wait_share': wait_share,
+            'worker_wait_share': worker_wait_share,
+            'cpus_available': self.cpus_available,
+            'oversubscribed': (worker_wait_share >= RUNQUEUE_DOMINANT_SHARE
+                               and worker_wait > worker_blocked),
+        }
@@ -0,0 +1,81 @@
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+AFFINITY_MODES = ['none', 'compact', 'scatter', 'physical-only']
+
+SYS_CPU_DIR = Path("/sys/devices/system/cpu")
+
+
+def read_topology() -> Dict[Tuple[int, int], List[int]]:
+    # (package, core) -> logical CPUs of that core (SMT siblings), only CPUs we may run on
+    allowed = os.sched_getaffinity(0)
+    cores: Dict[Tuple[int, int], List[int]] = {}
+
+    for cpu in sorted(allowed):
+        topology_dir = SYS_CPU_DIR / f"cpu{cpu}" / "topology"
+        try:
+            package = int((topology_dir / "physical_package_id").read_text())
+            core = int((topology_dir / "core_id").read_text())
+        except (OSError, ValueError):
+            # no topology info (containers, exotic kernels): treat every CPU as its own core
+            package, core = 0, cpu
+
+        cores.setdefault((package, core), []).append(cpu)
+
+    return dict(sorted(cores.items()))
+
+
+def _by_package(cores: Dict[Tuple[int, int], List[int]]) -> List[List[List[int]]]:
+    packages: Dict[int, List[List[int]]] = {}
+    for (package, _), cpus in cores.items():
+        packages.setdefault(package, []).append(cpus)
+    return list(packages.values())
+
+
+def _interleave(packages: List[List[List[int]]], sibling: int) -> List[int]:
+    # take the n-th SMT sibling of every core, alternating between packages
+    cpus = []
+    for i in range(max((len(p) for p in packages), default=0)):
+        for package in packages:
+            if i < len(package) and sibling < len(package[i]):
+                cpus.append(package[i][sibling])
+    return cpus
+
+
+def build_cpu_list(mode: str, count: int) -> Optional[List[int]]:
+    if mode == 'none':
+        return None
+
+    if mode not in AFFINITY_MODES:
+        raise ValueError(f"Unknown affinity mode: {mode}")
+
+    cores = read_topology()
+
+    if mode == 'compact':
+        # fill every SMT sibling of a core before moving to the next one
+        cpus = [cpu for siblings in cores.values() for cpu in siblings]
+    else:
+        packages = _by_package(cores)
+        max_siblings = max(len(siblings) for siblings in cores.values())
+        levels = 1 if mode == 'physical-only' else max_siblings
+        cpus = [cpu for sibling in range(levels) for cpu in _interleave(packages, sibling)]
+
+    return sorted(cpus[:max(1, count)])
+
+
+def format_cpu_list(cpus: Optional[List[int]]) -> str:
+    if not cpus:
+        return 'all'
+
+    ranges = []
+    start = prev = cpus[0]
+    for cpu in cpus[1:] + [None]:
+        if cpu is not None and cpu == prev + 1:
+            prev = cpu
+            continue
+        ranges.append(str(start) if start == prev else f"{start}-{prev}")
+        if cpu is not None:
+            start = prev = cpu
+
+    return ','.join(ranges)
@@ -2,9 +2,12 @@
 
 THREADS=4
 FILES=()
+EXTRA_ARGS=()
 
 for arg in "$@"; do
-    if [[ "$arg" =~ ^[0-9]+$ ]]; then
+    if [[ "$arg" == -* ]]; then
+        EXTRA_ARGS+=("$arg")
+    elif [[ "$arg" =~ ^[0-9]+$ ]]; then
         THREADS=$arg
     else
         filename=$(basename "$arg" .cpp)
@@ -27,6 +30,6 @@ else
     echo "Running all files from cpp/"
 fi
 
-python3 python/controller.py $PYTHON_ARGS
+python3 python/client.py $PYTHON_ARGS "${EXTRA_ARGS[@]}"
 
 echo ""
\ No newline at end of file